@@ -0,0 +1,43 @@
+"""Worker entry point and chunking rule shared by the process_files methods of both MEI processors."""
+import os
+
+
+def run_file(processor_cls, method_name, verbose, mei_path, *args, **kwargs):
+    """Run one processor method on a single MEI file (module level so it can be sent to worker processes).
+
+    Args:
+        processor_cls (type): Processor class to instantiate in the worker, e.g. MEI_Metadata_Updater
+        method_name (str): Name of the per-file method to call, e.g. 'apply_metadata'
+        verbose (bool): Passed on to the processor's constructor
+        mei_path (str): Path to the MEI file, passed as the method's first argument
+        *args, **kwargs: Any further arguments for the method
+
+    Returns:
+        tuple: (mei_path, status), where status is 'success' or an error message
+    """
+    try:
+        processor = processor_cls(verbose=verbose)
+        result = getattr(processor, method_name)(mei_path, *args, **kwargs)
+    except Exception as e:
+        return mei_path, f"Error: {e}"
+    if isinstance(result, str):
+        # the per-file methods return an error message instead of the XML bytes
+        return mei_path, result
+    return mei_path, 'success'
+
+
+def chunk_size(n_files, max_workers=None):
+    """Return the executor.map chunksize for a batch of n_files.
+
+    Files go to the workers in chunks to cut down on inter-process round trips; about four
+    chunks per worker keeps the load balanced when some files take longer than others.
+
+    Args:
+        n_files (int): Number of files in the batch
+        max_workers (int, optional): Number of worker processes. Defaults to os.cpu_count().
+
+    Returns:
+        int: Chunk size, at least 1
+    """
+    workers = max_workers or os.cpu_count() or 1
+    return max(1, n_files // (4 * workers))
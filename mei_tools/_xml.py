@@ -0,0 +1,25 @@
+"""Namespace constants and the shared XML parser used by both MEI processors."""
+import threading
+from lxml import etree
+
+MEI_NS = 'http://www.music-encoding.org/ns/mei'
+XML_NS = 'http://www.w3.org/XML/1998/namespace'
+XML_ID = f'{{{XML_NS}}}id'
+
+# lxml parsers must not be shared between threads, so each thread lazily gets its own
+_thread_local = threading.local()
+
+
+def get_parser():
+    """Return this thread's XMLParser, creating it on first use.
+
+    Blank text is dropped at parse time since the output is re-indented, huge_tree lifts
+    libxml2's size limits for long scores, and collect_ids=False skips the xml:id hash
+    table (ids are only ever matched through XPath).
+    """
+    parser = getattr(_thread_local, 'parser', None)
+    if parser is None:
+        parser = _thread_local.parser = etree.XMLParser(remove_blank_text=True,
+                                                        huge_tree=True,
+                                                        collect_ids=False)
+    return parser
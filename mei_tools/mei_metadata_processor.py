@@ -1,8 +1,119 @@
 import os
-import xml.etree.ElementTree as ET
+import hashlib
 from lxml import etree
+from ._xml import MEI_NS, XML_ID, get_parser
+from ._batch import run_file, chunk_size
 from datetime import datetime
 from copy import deepcopy
+from functools import lru_cache, partial
+from concurrent.futures import ProcessPoolExecutor
+
+
+@lru_cache(maxsize=512)
+def _split_pipe(value):
+    """Split a '|'-separated metadata cell into a tuple of stripped, non-empty names.
+
+    Editor and Copyright_Owner cells usually repeat across a whole corpus, so the result is cached.
+    """
+    return tuple(part.strip() for part in value.split('|') if part.strip())
+
+
+_NS = {'mei': MEI_NS}
+
+
+def _ensure(parent, name, following=()):
+    """Return the first MEI child of parent called name, creating an empty one if there is none.
+
+    A new child is placed before the first existing sibling named in following, so a
+    repaired header keeps the section order the MEI schema expects; otherwise it goes last.
+    """
+    tag = f'{{{MEI_NS}}}{name}'
+    # iterchildren walks only the direct children, with no path parsing
+    child = next(parent.iterchildren(tag), None)
+    if child is None:
+        child = etree.SubElement(parent, tag)
+        _move_before_following(parent, child, following)
+    return child
+
+
+def _move_before_following(parent, child, following):
+    """Move child in front of the first sibling whose MEI name is in following, if there is one."""
+    following_tags = {f'{{{MEI_NS}}}{name}' for name in following}
+    for sibling in parent.iterchildren(*following_tags):
+        if sibling is not child:
+            sibling.addprevious(child)
+            break
+
+
+# MEI schema order of the header sections that apply_metadata may have to create:
+# each tuple lists the siblings that must come after the named section
+_AFTER_FILE_DESC = ('encodingDesc', 'workList', 'manifestationList', 'extMeta', 'revisionDesc')
+_AFTER_TITLE_STMT = ('editionStmt', 'extent', 'pubStmt', 'seriesStmt', 'notesStmt', 'sourceDesc')
+_AFTER_PUB_STMT = ('seriesStmt', 'notesStmt', 'sourceDesc')
+_AFTER_ENCODING_DESC = ('workList', 'manifestationList', 'extMeta', 'revisionDesc')
+_AFTER_APP_INFO = ('editorialDecl', 'projectDesc', 'samplingDecl', 'domainsDecl', 'tagsDecl', 'classDecls')
+_AFTER_WORK_LIST = ('manifestationList', 'extMeta', 'revisionDesc')
+_AFTER_MANIFESTATION_LIST = ('extMeta', 'revisionDesc')
+# everything the MEI 4 work content model allows after its titles
+_AFTER_WORK_TITLE = ('respStmt', 'arranger', 'author', 'composer', 'contributor', 'editor',
+                     'funder', 'librettist', 'lyricist', 'sponsor', 'dedicatee', 'creation',
+                     'history', 'langUsage', 'key', 'mensuration', 'meter', 'tempo', 'incip',
+                     'otherChar', 'perfMedium', 'perfDuration', 'audience', 'contents', 'context',
+                     'biblList', 'notesStmt', 'classification', 'castList', 'expressionList',
+                     'componentList', 'relationList', 'extMeta')
+_AFTER_WORK_COMPOSER = _AFTER_WORK_TITLE[_AFTER_WORK_TITLE.index('contributor'):]
+_AFTER_WORK_CLASSIFICATION = ('castList', 'expressionList', 'componentList', 'relationList', 'extMeta')
+
+
+# constant header fragments, parsed once and copied into each file
+_PUBLISHER_TEMPLATE = etree.fromstring("""<publisher>Citations: Gesualdo Online  https://ricercardatalab.cesr.univ-tours.fr/fr/projects/3/</publisher>""")
+_APPLICATION_TEMPLATE = etree.fromstring("""<application version="2.0.0">
+            <name>MEI Updater 2025</name>
+        </application>""")
+# empty header for files that have none; in the MEI namespace so the lookups below find its sections
+_MEI_HEAD_TEMPLATE = etree.fromstring(
+    '<meiHead xmlns="http://www.music-encoding.org/ns/mei">'
+    '<fileDesc><titleStmt/><pubStmt/></fileDesc>'
+    '<encodingDesc><appInfo/></encodingDesc>'
+    '<workList><work><title/></work></workList>'
+    '</meiHead>'
+)
+# skeleton of the source description; publishers and text are filled in per file
+_MANIFESTATION_LIST_TEMPLATE = etree.fromstring(
+    '<manifestationList><manifestation>'
+    '<titleStmt><title/></titleStmt>'
+    '<pubStmt><publisher/><date/></pubStmt>'
+    '<physLoc><repository><corpName/><identifier/><geogName/></repository></physLoc>'
+    '</manifestation></manifestationList>'
+)
+
+
+def _revised_name(mei_path):
+    """Return the file name an updated MEI file is saved under: <basename>_rev.mei."""
+    return os.path.splitext(os.path.basename(mei_path))[0] + '_rev.mei'
+
+
+def _metadata_digest(matching_dict):
+    """Return a short fingerprint of a metadata dictionary, used to spot edited rows."""
+    return hashlib.sha1(repr(sorted(matching_dict.items())).encode('utf-8')).hexdigest()
+
+
+def _digest_path(mei_path, output_folder):
+    """Return the hidden sidecar file that records the metadata an output was built from."""
+    return os.path.join(output_folder, f'.{_revised_name(mei_path)}.sha1')
+
+
+def _is_up_to_date(mei_path, matching_dict, output_folder):
+    """Check whether the _rev output is newer than its input and was built from the same metadata."""
+    output_path = os.path.join(output_folder, _revised_name(mei_path))
+    try:
+        if os.path.getmtime(output_path) < os.path.getmtime(mei_path):
+            return False
+        with open(_digest_path(mei_path, output_folder)) as f:
+            return f.read().strip() == _metadata_digest(matching_dict)
+    except OSError:
+        return False
+
 
 class MEI_Metadata_Updater:
     """
@@ -25,19 +136,21 @@ class MEI_Metadata_Updater:
         self.output_folder = output_folder if output_folder else input_folder
         
         # Ensure output folder exists
-        if self.output_folder and not os.path.exists(self.output_folder):
-            os.makedirs(self.output_folder)
+        if self.output_folder:
+            os.makedirs(self.output_folder, exist_ok=True)
             
         # Set default namespace if not provided
-        self.namespace = namespace if namespace else {'mei': 'http://www.music-encoding.org/ns/mei'}
+        self.namespace = namespace if namespace else dict(_NS)
         
         # Verbose mode for debugging
         self.verbose = verbose
         
-        # Initialize counters for processing statistics
+        # Initialize counters for processing statistics; these add up over every
+        # process_files call made on this instance
         self.processed_files = 0
         self.successful_updates = 0
         self.failed_updates = 0
+        self.skipped_files = 0
 
     # now the functions
     def apply_metadata(self, mei_path, matching_dict, output_folder):
@@ -52,29 +165,23 @@ class MEI_Metadata_Updater:
             str: Formatted XML string of the updated MEI file
         """
         # get the file and build revised name
-        full_path = os.path.basename(mei_path)
-        basename = os.path.splitext(os.path.basename(full_path))[0]
-        revised_name = basename + "_rev.mei"
-        print('Getting ' + basename)
+        revised_name = _revised_name(mei_path)
+        if self.verbose:
+            print('Getting ' + os.path.splitext(os.path.basename(mei_path))[0])
         
         try:
             # Parse the MEI file using lxml.etree
-            mei_doc = etree.parse(mei_path)
+            mei_doc = etree.parse(mei_path, get_parser())
             root = mei_doc.getroot()
         except etree.ParseError as e:
             print(f"Error parsing {mei_path}: {e}")
             return f"Error: Could not parse {mei_path}. Make sure it contains valid XML."
         
-        # define namespace for mei
-        ns = {'mei': 'http://www.music-encoding.org/ns/mei'}
-
         # new ID removal 
         
         def remove_ids_from_head_children(element):
             # Remove xml:id if present
-            attrib_key = "{http://www.w3.org/XML/1998/namespace}id"
-            if attrib_key in element.attrib:
-                del element.attrib[attrib_key]
+            element.attrib.pop(XML_ID, None)
                 
             # Recursively process children
             for child in element:
@@ -82,152 +189,122 @@ class MEI_Metadata_Updater:
         
         # already doing this in the music feature tool with optional module
         # Revert staffDef/label to staffDef/@label
-        # staffDefs = root.findall('.//mei:staffDef', namespaces=ns)
+        # staffDefs = root.findall('.//mei:staffDef', namespaces=self.namespace)
         # for staffDef in staffDefs:
-        #     label = staffDef.find('mei:label', namespaces=ns)
+        #     label = staffDef.find('mei:label', namespaces=self.namespace)
         #     if label is not None and label.text:
         #         staffDef.set('label', label.text)
         
         # work on fileDesc
-        head_el = root.find('mei:meiHead', namespaces=ns)
-        fileDesc_el = head_el.find('mei:fileDesc', namespaces=ns)
+        head_el = next(root.iterchildren(f'{{{MEI_NS}}}meiHead'), None)
+        if head_el is None:
+            # files exported without a header get an empty skeleton to fill in
+            head_el = deepcopy(_MEI_HEAD_TEMPLATE)
+            root.insert(0, head_el)
+        fileDesc_el = _ensure(head_el, 'fileDesc', _AFTER_FILE_DESC)
         
         # title
-        titleStmt_el = fileDesc_el.find('mei:titleStmt', namespaces=ns)
+        titleStmt_el = _ensure(fileDesc_el, 'titleStmt', _AFTER_TITLE_STMT)
         titleStmt_el.clear()
+        title = matching_dict['Title']
         title_el = etree.SubElement(titleStmt_el, 'title')
-        title_el.text = matching_dict['Title']
+        title_el.text = title
         
         respStmt_el = etree.SubElement(titleStmt_el, 'respStmt')
         
         # composer
-        composer_el = etree.Element('persName', {
+        composer_el = etree.SubElement(respStmt_el, 'persName', {
             'role': 'composer',
             'auth': 'VIAF',
             'auth.uri': matching_dict['Composer_VIAF']
         })
         composer_el.text = matching_dict['Composer_Name']
-        respStmt_el.append(composer_el)
         
         # editors
-        editors = matching_dict['Editor'].split('|')
-        for editor in editors:
+        for editor in _split_pipe(matching_dict.get('Editor') or ''):
             etree.SubElement(respStmt_el, 'persName', {
                 'role': 'editor'
-            }).text = editor.strip()
+            }).text = editor
         
         # pubStmt
-        pubStmt_el = fileDesc_el.find('mei:pubStmt', namespaces=ns)
+        pubStmt_el = _ensure(fileDesc_el, 'pubStmt', _AFTER_PUB_STMT)
         pubStmt_el.clear()
-        pubStmt_el.append(etree.fromstring("""<publisher>Citations: Gesualdo Online  https://ricercardatalab.cesr.univ-tours.fr/fr/projects/3/</publisher>"""))
+        pubStmt_el.append(deepcopy(_PUBLISHER_TEMPLATE))
         
-        for distributor in matching_dict['Copyright_Owner'].split('|'):
-            pubStmt_el.append(etree.fromstring(f'<distributor>{distributor}</distributor>'))
+        for distributor in _split_pipe(matching_dict.get('Copyright_Owner') or ''):
+            etree.SubElement(pubStmt_el, 'distributor').text = distributor
         
         current_date = datetime.now().isoformat()
-        pubStmt_el.append(etree.fromstring(f'<date isodate="{current_date}"/>'))
-        pubStmt_el.append(etree.fromstring(f'<availability>{matching_dict["Rights_Statement"]}</availability>'))
+        etree.SubElement(pubStmt_el, 'date', isodate=current_date)
+        etree.SubElement(pubStmt_el, 'availability').text = matching_dict["Rights_Statement"]
         
         # appInfo
-        appInfo_el = head_el.find('mei:encodingDesc/mei:appInfo', namespaces=ns)
-        if appInfo_el is not None:
-            # Remove all existing application tags
-            for app in appInfo_el.findall('mei:application', namespaces=ns):
-                appInfo_el.remove(app)
+        encodingDesc_el = _ensure(head_el, 'encodingDesc', _AFTER_ENCODING_DESC)
+        appInfo_el = _ensure(encodingDesc_el, 'appInfo', _AFTER_APP_INFO)
+        # Remove all existing application tags in one pass inside libxml2
+        etree.strip_elements(appInfo_el, f'{{{MEI_NS}}}application', with_tail=False)
     
         # Add the new application tag
-        application = """<application version="2.0.0">
-            <name>MEI Updater 2025</name>
-        </application>"""
-        appInfo_el.append(etree.fromstring(application))
+        appInfo_el.append(deepcopy(_APPLICATION_TEMPLATE))
         
         
         # work data
-        worklist_el = head_el.find('mei:workList', namespaces=ns)
-        work_el = worklist_el.find('mei:work', namespaces=ns)
+        worklist_el = _ensure(head_el, 'workList', _AFTER_WORK_LIST)
+        work_el = _ensure(worklist_el, 'work')
         # title
-        work_el.find('mei:title', namespaces=ns).text = matching_dict['Title']
-        # composer (using persName structure)
-        composer_el = etree.Element('persName', {
-            'role': 'composer',
-            'auth': 'VIAF',
-            'auth.uri': matching_dict['Composer_VIAF']
-        })
-        composer_el.text = matching_dict['Composer_Name']
-        etree.SubElement(work_el, 'composer').append(deepcopy(composer_el))
-        
-        classification = f'<classification><termList><term>{matching_dict["Genre"].strip()}</term></termList></classification>'
-        work_el.append(etree.fromstring(classification))
-        
-        # Create a new manifestationList without any attributes
-        new_manifestation_list = etree.Element("manifestationList")
+        _ensure(work_el, 'title', _AFTER_WORK_TITLE).text = title
+        # composer (same persName as in titleStmt)
+        work_composer_el = etree.SubElement(work_el, 'composer')
+        work_composer_el.append(deepcopy(composer_el))
+        _move_before_following(work_el, work_composer_el, _AFTER_WORK_COMPOSER)
+        
+        classification_el = etree.SubElement(work_el, 'classification')
+        _move_before_following(work_el, classification_el, _AFTER_WORK_CLASSIFICATION)
+        term_list_el = etree.SubElement(classification_el, 'termList')
+        etree.SubElement(term_list_el, 'term').text = matching_dict["Genre"].strip()
+        
+        # Copy the manifestationList skeleton and fill in the source details
+        new_manifestation_list = deepcopy(_MANIFESTATION_LIST_TEMPLATE)
+        manifestation = new_manifestation_list[0]
+        title_stmt, pub_stmt, phys_loc = manifestation
+        title_stmt[0].text = matching_dict['Source_Title']
 
-        # Create the manifestation element
-        manifestation = etree.SubElement(new_manifestation_list, "manifestation")
-
-        # Add titleStmt with proper structure
-        title_stmt = etree.SubElement(manifestation, "titleStmt")
-        title = etree.SubElement(title_stmt, "title")
-        title.text = matching_dict['Source_Title']
-
-        # Add pubStmt with proper structure
-        pub_stmt = etree.SubElement(manifestation, "pubStmt")
-        publisher = etree.SubElement(pub_stmt, "publisher")
-        pers_name = etree.SubElement(publisher, "persName")
-        pers_name.set("auth", "VIAF")
-        pers_name.set("auth.uri", matching_dict['Publisher_1_VIAF'])
-        pers_name.text = matching_dict['Source_Publisher_1']
-
-        # Add date element
-        date = etree.SubElement(pub_stmt, "date")
+        publisher, date = pub_stmt
         date.text = matching_dict['Source_Date']
 
-        # Add physLoc with proper structure
-        phys_loc = etree.SubElement(manifestation, "physLoc")
-        repository = etree.SubElement(phys_loc, "repository")
-        corp_name = etree.SubElement(repository, "corpName")
-        corp_name.text = matching_dict['Source_Institution']
+        # one persName per source publisher that is filled in
+        for name_key, viaf_key in (('Source_Publisher_1', 'Publisher_1_VIAF'),
+                                   ('Source_Publisher_2', 'Publisher_2_VIAF')):
+            publisher_name = (matching_dict.get(name_key) or '').strip()
+            if publisher_name:
+                etree.SubElement(publisher, 'persName', {
+                    'auth': 'VIAF',
+                    'auth.uri': matching_dict.get(viaf_key) or ''
+                }).text = publisher_name
 
-        # Add shelfmark with proper structure
-        identifier = etree.SubElement(repository, "identifier")
+        # institution, shelfmark and location
+        corp_name, identifier, geog_name = phys_loc[0]
+        corp_name.text = matching_dict['Source_Institution']
         identifier.text = matching_dict['Source_Shelfmark']
-
-        # Add geogName with proper structure
-        geog_name = etree.SubElement(repository, "geogName")
         geog_name.text = matching_dict['Source_Location']
 
-        # Append to head element instead of root
+        # Add to the head element instead of root, ahead of any extMeta/revisionDesc
         head_el.append(new_manifestation_list)
-        
-        # check for second publisher
-        if len(matching_dict['Source_Publisher_2'].strip()) > 1:
-            # add second publisher
-            publisher.append(
-                etree.fromstring(f'<persName auth="VIAF" auth.uri="{matching_dict["Publisher_2_VIAF"]}">{matching_dict["Source_Publisher_2"]}</persName>')
-            )
-        
-        # pub date
-        date.text = matching_dict['Source_Date']
+        _move_before_following(head_el, new_manifestation_list, _AFTER_MANIFESTATION_LIST)
 
         # now we REMOVE the ids from anywhere in the head
-        head_el = root.find('mei:meiHead', namespaces=ns)
-        if head_el is not None:
-            # Skip root meiHead but process its children
-            for child in head_el:
-                remove_ids_from_head_children(child)
+        # (head_el was found above; skip meiHead itself but process its children)
+        for child in head_el:
+            remove_ids_from_head_children(child)
         
         # save the result
         output_file_path = os.path.join(output_folder, revised_name)
         
-        # Get the MEI namespace
-        mei_ns = "http://www.music-encoding.org/ns/mei"
-        
         # Modify the existing root element instead of creating a new one
         root.attrib["meiversion"] = root.get("meiversion", "4.0.0")
         
         # Remove any existing xml:id if it exists
-        if "{http://www.w3.org/XML/1998/namespace}id" in root.attrib:
-            del root.attrib["{http://www.w3.org/XML/1998/namespace}id"]
+        root.attrib.pop(XML_ID, None)
         
         # Format the XML with proper indentation
         etree.indent(root, space="    ")
@@ -242,8 +319,97 @@ class MEI_Metadata_Updater:
         )
         
         # Write to file
+        os.makedirs(output_folder, exist_ok=True)
         with open(output_file_path, 'wb') as f:
             f.write(formatted_xml)
         
-        print(f'Saved updated {revised_name}')
-        return formatted_xml
\ No newline at end of file
+        if self.verbose:
+            print(f'Saved updated {revised_name}')
+        return formatted_xml
+
+    def process_files(self, metadata_dict_list, max_workers=None, skip_unchanged=False):
+        """Applies metadata to every MEI file in the input folder, in parallel.
+
+        Each file is matched to its metadata dictionary by the 'MEI_Name' key and
+        handed to a separate worker process.
+
+        Args:
+            metadata_dict_list (list): List of metadata dictionaries (one per MEI file)
+            max_workers (int, optional): Number of worker processes. Defaults to os.cpu_count().
+            skip_unchanged (bool, optional): Skip files whose _rev output is newer than the input
+                                             and was built from the same metadata row. Defaults to False.
+                                             Only runs with this option on write the hidden
+                                             .<name>_rev.mei.sha1 file that records the row.
+
+        Earlier _rev.mei outputs in the input folder are not picked up again, and files
+        with no metadata row are reported as 'no metadata' rather than counted as failures.
+        The instance counters (processed_files, successful_updates, skipped_files,
+        failed_updates) accumulate across calls; the printed summary covers this call only.
+
+        Returns:
+            dict: Mapping of each MEI path to 'success', 'skipped', 'no metadata' or an error message
+
+        Raises:
+            ValueError: If the processor was created without an input folder
+        """
+        if not self.input_folder:
+            raise ValueError("process_files needs an input_folder; pass it when creating MEI_Metadata_Updater")
+
+        # create the output folder once, before any worker writes to it
+        os.makedirs(self.output_folder, exist_ok=True)
+
+        # scandir reports file types from the directory listing itself, so no per-entry stat;
+        # outputs from earlier runs land here too when output_folder defaults to input_folder
+        with os.scandir(self.input_folder) as entries:
+            mei_paths = sorted(entry.path for entry in entries
+                               if entry.name.endswith('.mei') and not entry.name.endswith('_rev.mei')
+                               and entry.is_file())
+        md_by_name = {md['MEI_Name'].strip(): md for md in metadata_dict_list}
+
+        results = {}
+        pairs = []
+        for mei_path in mei_paths:
+            matching_dict = md_by_name.get(os.path.basename(mei_path))
+            if matching_dict is None:
+                results[mei_path] = 'no metadata'
+            elif skip_unchanged and _is_up_to_date(mei_path, matching_dict, self.output_folder):
+                results[mei_path] = 'skipped'
+            else:
+                pairs.append((mei_path, matching_dict))
+
+        if pairs:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                paths, dicts = zip(*pairs)
+                worker = partial(run_file, MEI_Metadata_Updater, 'apply_metadata', self.verbose)
+                for mei_path, status in executor.map(worker, paths, dicts,
+                                                     [self.output_folder] * len(paths),
+                                                     chunksize=chunk_size(len(paths), max_workers)):
+                    results[mei_path] = status
+            # with skip_unchanged, remember which metadata each output was built from;
+            # otherwise drop any record left by an earlier run, as it no longer matches
+            for mei_path, matching_dict in pairs:
+                if results[mei_path] != 'success':
+                    continue
+                digest_path = _digest_path(mei_path, self.output_folder)
+                if skip_unchanged:
+                    with open(digest_path, 'w') as f:
+                        f.write(_metadata_digest(matching_dict))
+                elif os.path.exists(digest_path):
+                    os.remove(digest_path)
+
+        # statistics for this call
+        successful = sum(1 for status in results.values() if status == 'success')
+        skipped = sum(1 for status in results.values() if status == 'skipped')
+        unmatched = sum(1 for status in results.values() if status == 'no metadata')
+        failed = len(results) - successful - skipped - unmatched
+
+        # update the running totals for this instance
+        self.processed_files += len(results) - unmatched
+        self.successful_updates += successful
+        self.skipped_files += skipped
+        self.failed_updates += failed
+
+        if self.verbose:
+            print(f"Processed {len(results) - unmatched} files: {successful} updated, "
+                  f"{skipped} unchanged, {failed} failed ({unmatched} without metadata)")
+        return results
@@ -1,17 +1,34 @@
 import os
-import random
+import secrets
+import itertools
 from lxml import etree
-import xml.etree.ElementTree as ET
-import glob as glob
+from ._xml import MEI_NS, XML_NS, XML_ID, get_parser
+from ._batch import run_file, chunk_size
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+
+_NS = {'mei': MEI_NS, 'xml': XML_NS}
+
+# XPath queries compiled once per process rather than re-parsed for every file
+_XP_INCIPIT = etree.XPath('//mei:measure[@label="0"][@n="1"]', namespaces=_NS)
+_XP_MEASURES = etree.XPath('//mei:measure', namespaces=_NS)
+_XP_COLOR_NOTES = etree.XPath('.//mei:note[@color]', namespaces=_NS)
+_XP_EMPTY_VERSES = etree.XPath('.//mei:syllable/mei:verse[not(*)]', namespaces=_NS)
+
 
 class MEI_Music_Feature_Processor:
     """
     A class for processing MEI XML files to correct various music features.
     """
     
-    def __init__(self):
-        """Initialize the MEI Music Feature Processor."""
-        pass
+    def __init__(self, verbose=True):
+        """Initialize the MEI Music Feature Processor.
+
+        Args:
+            verbose (bool, optional): Whether to print a progress report for each module. Defaults to True.
+                                      Parse errors and the check_for_chords report are always printed.
+        """
+        self.verbose = verbose
 
     def process_music_features(self, mei_path,
                                output_folder,
@@ -63,28 +80,26 @@ class MEI_Music_Feature_Processor:
         full_path = os.path.basename(mei_path)
         basename = os.path.splitext(os.path.basename(full_path))[0]
         revised_name = basename + "_rev.mei"
-        print('Getting ' + basename)
+        if self.verbose:
+            print('Getting ' + basename)
         
         # new
         try:
-            # Use lxml.etree instead of xml.etree.ElementTree
-            mei_doc = etree.parse(mei_path)
+            # Use lxml.etree with the shared, reusable parser
+            mei_doc = etree.parse(mei_path, get_parser())
             root = mei_doc.getroot()
         except etree.ParseError as e:
             print(f"Error parsing {mei_path}: {e}")
             return f"Error: Could not parse {mei_path}. Make sure it contains valid XML."
         
 
-        # Define the namespaces
-        ns = {'mei': 'http://www.music-encoding.org/ns/mei',
-              'xml': 'http://www.w3.org/XML/1998/namespace'
-        }
+        # the namespaces (module constants, shared by every call)
+        ns = _NS
 
         # inicipt removal
         if remove_incipit == True:
             # Find measure with label="0" and n="1"
-            incipit_xpath = '//mei:measure[@label="0"][@n="1"]'
-            measures = root.xpath(incipit_xpath, namespaces=ns)
+            measures = _XP_INCIPIT(root)
             
             if measures:
                 incipit = measures[0]
@@ -93,102 +108,62 @@ class MEI_Music_Feature_Processor:
                 parent = incipit.getparent()
                 if parent is not None:
                     parent.remove(incipit)
-                    print("Measure removed successfully!")
+                    if self.verbose:
+                        print("Measure removed successfully!")
                     
                     # Renumber remaining measures starting at 1
-                    measures = root.xpath('//mei:measure', namespaces=ns)
-                    print("\nRenumbering measures...")
+                    measures = _XP_MEASURES(root)
+                    if self.verbose:
+                        print("\nRenumbering measures...")
                     for idx, measure in enumerate(measures, 1):  # Start enumeration at 1
-                        old_label = measure.get('label')
-                        old_num = measure.get('n')
-                        
                         # Set both n and label to match the current position
                         new_number = str(idx)
                         measure.set('n', new_number)
                         measure.set('label', new_number)
                     
-        # page break removal
-        # pb removal
-        if remove_pb == True:
-            # Find pb elements
-            pb_elements = root.findall('.//mei:pb', namespaces=ns)
-            count = len(pb_elements)
-            print(f"Found {count} page breaks to remove.")
-            for pb in pb_elements:
-                pb.getparent().remove(pb)
-            
-        # sb removal
-        if remove_sb == True:
-            # Find sb elements
-            sb_elements = root.findall('.//mei:sb', namespaces=ns)
-            count = len(sb_elements)
-            print(f"Found {count} section breaks to remove.")
-            for sb in sb_elements:
-                sb.getparent().remove(sb)
-              
-        # remove annotation
-        if remove_annotation == True:
-            annotations = root.findall('.//mei:annot', namespaces=ns)
-            count = len(annotations)
-            print(f"Found {count} annotations to remove.")
-            for annotation in annotations:
-                annotation.getparent().remove(annotation)
-
-        # dir elements, which are like annotations
-        if remove_dir == True:
-            # Find pb elements
-            dir_elements = root.findall('.//mei:dir', namespaces=ns)
-            count = len(dir_elements)
-            print(f"Found {count} direction elements to remove.")
-            for dir in dir_elements:
-                dir.getparent().remove(dir)
+        # page breaks, section breaks, annotations, directions and ligature brackets:
+        # counted in one walk (only when reporting), then removed together by lxml
+        removals = [(remove_pb, 'pb', "page breaks"),
+                    (remove_sb, 'sb', "section breaks"),
+                    (remove_annotation, 'annot', "annotations"),
+                    (remove_dir, 'dir', "direction elements"),
+                    (remove_ligature_bracket, 'bracketSpan', "ligatures")]
+        removal_tags = [f'{{{MEI_NS}}}{name}' for flag, name, _ in removals if flag == True]
+        if removal_tags:
+            if self.verbose:
+                counts = dict.fromkeys(removal_tags, 0)
+                for elem in root.iter(*removal_tags):
+                    counts[elem.tag] += 1
+                for flag, name, label in removals:
+                    if flag == True:
+                        print(f"Found {counts[f'{{{MEI_NS}}}{name}']} {label} to remove.")
+            etree.strip_elements(root, *removal_tags, with_tail=True)
 
-        # ligature brackets
-        if remove_ligature_bracket == True:
-            # Find pb elements
-            bracket_elements = root.findall('.//mei:bracketSpan', namespaces=ns)
-            count = len(bracket_elements)
-            print(f"Found {count} ligatures to remove.")
-            for bracket in bracket_elements:
-                bracket.getparent().remove(bracket)
-        
         # variants
         if remove_variants == True:
             # Find all app elements (variant apparatus)
-            apps = root.findall('.//mei:app', namespaces=ns)
+            apps = list(root.iter(f'{{{MEI_NS}}}app'))
             count = len(apps)
-            print(f"Found {count} variants to correct.")
+            if self.verbose:
+                print(f"Found {count} variants to correct.")
+            lem_tag = f'{{{MEI_NS}}}lem'
             for app in apps:
                 # Get the parent layer
                 app_parent_layer = app.getparent()
                 
-                # Find all lem elements containing notes
-                lems = app.findall('.//mei:lem', namespaces=ns)
-            
-                # Move notes to parent layer
-                for lem in lems:
-                    notes = lem.findall('.//mei:note', namespaces=ns)
-                    for note in notes:
-                        # Remove note from current position
-                        lem.remove(note)
-                        # Add note to parent layer
-                        app_parent_layer.append(note)
-                
-                # Remove all rdg elements
-                rdgs = app.findall('.//mei:rdg', namespaces=ns)
-                count = len(rdgs)
-                # print(f"Found {count} readings to remove.")
-                for rdg in rdgs:
-                    rdg_parent_layer = rdg.getparent()
-                    rdg_parent_layer.remove(rdg)
+                # Move the contents of each lem (a direct child of app) to the parent layer as they
+                # are, so chords, beams and rests stay intact; extend() unlinks them from the lem
+                for lem in app.iterchildren(lem_tag):
+                    app_parent_layer.extend(list(lem))
                 
+                # the rdg elements go with the app element itself
                 # Finally, remove the app element itself
                 app_parent_layer.remove(app)
         
         # remove anchored text tags
         if remove_anchored_text == True:
             # find all anchored
-            anchored = root.findall('.//mei:anchoredText', namespaces=ns)
+            anchored = list(root.iter(f'{{{MEI_NS}}}anchoredText'))
 
             # remove the anchors
             for anchor in anchored:
@@ -196,50 +171,33 @@ class MEI_Music_Feature_Processor:
                 parent_layer = anchor.getparent()
                 if parent_layer is not None:
                     parent_layer.remove(anchor)
-                    print("Anchored text removed successfully!")
+                    if self.verbose:
+                        print("Anchored text removed successfully!")
             
         # remove timestamp and velocity
         if remove_timestamp == True:
-            # for notes
-            print('Checking and Removing timestamp.')
-            notes = root.findall('.//mei:note', namespaces=ns)
-            for note in notes:
-                # Remove timestamp attribute
-                if 'tstamp.real' in note.attrib:
-                    del note.attrib['tstamp.real']
-                # Remove velocity attribute
-                if 'vel' in note.attrib:
-                    del note.attrib['vel']
-            
-            # Remove timestamp and velocity attributes from rests
-            rests = root.findall('.//mei:rest', namespaces=ns)
-            for rest in rests:
-                if 'tstamp.real' in rest.attrib:
-                    del rest.attrib['tstamp.real']
-                if 'vel' in rest.attrib:
-                    del rest.attrib['vel']
-            
-            # Remove timestamp and velocity attributes from mRests
-            mrests = root.findall('.//mei:mRest', namespaces=ns)
-            for mrest in mrests:
-                if 'tstamp.real' in mrest.attrib:
-                    del mrest.attrib['tstamp.real']
-                if 'vel' in mrest.attrib:
-                    del mrest.attrib['vel']
-            
-            # Remove tstamp2 from ties for Verovio compatibility
-            ties = root.findall('.//mei:tie', namespaces=ns)
-            for tie in ties:
-                if 'tstamp' in tie.attrib:
-                    del tie.attrib['tstamp']
-                if 'tstamp2' in tie.attrib:
-                    del tie.attrib['tstamp2']    
+            if self.verbose:
+                print('Checking and Removing timestamp.')
+            # one walk over notes, rests, mRests and ties instead of a findall per tag
+            tie_tag = f'{{{MEI_NS}}}tie'
+            for elem in root.iter(f'{{{MEI_NS}}}note', f'{{{MEI_NS}}}rest',
+                                  f'{{{MEI_NS}}}mRest', tie_tag):
+                attrib = elem.attrib
+                if elem.tag == tie_tag:
+                    # Remove tstamp2 from ties for Verovio compatibility
+                    attrib.pop('tstamp', None)
+                    attrib.pop('tstamp2', None)
+                else:
+                    # Remove timestamp and velocity attributes
+                    attrib.pop('tstamp.real', None)
+                    attrib.pop('vel', None)
         
         # add time signature information to all scoreDefs (for CMME and JRP)
         if correct_cmme_time_signatures == True:
-            score_defs = root.findall('.//mei:scoreDef', namespaces=ns)
+            score_defs = list(root.iter(f'{{{MEI_NS}}}scoreDef'))
             count = len(score_defs)
-            print(f"Found {count} scoreDef elements to process.")
+            if self.verbose:
+                print(f"Found {count} scoreDef elements to process.")
             
             for score_def in score_defs:
                 # Find the first staffDef in this scoreDef
@@ -256,16 +214,16 @@ class MEI_Music_Feature_Processor:
                         score_def.set('meter.unit', meter_unit)
                         
                         # Remove meter attributes from all staffDefs in this scoreDef
-                        staff_defs = score_def.findall('.//mei:staffDef', namespaces=ns)
-                        for staff_def in staff_defs:
+                        for staff_def in score_def.iter(f'{{{MEI_NS}}}staffDef'):
                             staff_def.attrib.pop('meter.count', None)
                             staff_def.attrib.pop('meter.unit', None)
         
         # add time signature information to scoreDef for JRP meterSig codings
         if correct_jrp_time_signatures == True:
-            score_defs = root.findall('.//mei:scoreDef', namespaces=ns)
+            score_defs = list(root.iter(f'{{{MEI_NS}}}scoreDef'))
             count = len(score_defs)
-            print(f"Found {count} scoreDef elements to process.")
+            if self.verbose:
+                print(f"Found {count} scoreDef elements to process.")
             
             for score_def in score_defs:
                 # Find the first staffDef in this scoreDef
@@ -284,100 +242,67 @@ class MEI_Music_Feature_Processor:
         # fix mrests under 3/1
         if correct_mrests == True:
             # First pass: identify which measures should be processed
-            # Build a parent map for efficient parent lookup
-            parent_map = {c: p for p in root.iter() for c in p}
             # set counter
             mRest_counter = 0
-            
-            # First: find all scoreDef and measure elements in document order
-            elements = []
-            for element in root.iter():
-                if element.tag == f"{{{ns['mei']}}}scoreDef" or element.tag == f"{{{ns['mei']}}}measure":
-                    elements.append(element)
+            score_def_tag = f"{{{MEI_NS}}}scoreDef"
             
             # Track which measures should be processed
-            measures_to_process = set()
+            measures_to_process = []
             current_meter_valid = False
             
-            # Process elements in document order
-            for element in elements:
-                if element.tag == f"{{{ns['mei']}}}scoreDef":
+            # Process scoreDef and measure elements in document order
+            for element in root.iter(score_def_tag, f"{{{MEI_NS}}}measure"):
+                if element.tag == score_def_tag:
                     # Check if this scoreDef has the required meter attributes
                     meter_count = element.get('meter.count')
                     meter_unit = element.get('meter.unit')
                     
                     if meter_count == '3' and meter_unit == '1':
                         current_meter_valid = True
-                        # Fix the f-string syntax
-                        xml_id = element.get(f"{{{ns['xml']}}}id")
-                        print(f"Found scoreDef with meter.count=3 and meter.unit=1")
+                        if self.verbose:
+                            print(f"Found scoreDef with meter.count=3 and meter.unit=1")
                     elif meter_count is not None or meter_unit is not None:
                         # Any other scoreDef with meter attributes resets our context
                         current_meter_valid = False
                 
-                elif element.tag == f"{{{ns['mei']}}}measure" and current_meter_valid:
+                elif current_meter_valid:
                     # If we're in a valid meter context, mark this measure for processing
-                    measure_id = element.get(f"{{{ns['xml']}}}id")
-                    if measure_id:
-                        measures_to_process.add(measure_id)
-                        # print(f"Adding measure {measure_id} to processing list")
+                    if element.get(XML_ID):
+                        measures_to_process.append(element)
             
-            print(f"Found {len(measures_to_process)} 3/1 measures check for mRests.")
+            if self.verbose:
+                print(f"Found {len(measures_to_process)} 3/1 measures check for mRests.")
             
             # Process each identified measure
             
-            for measure_id in measures_to_process:
-                # Find the measure by ID
-                measure = root.find(f'.//mei:measure[@xml:id="{measure_id}"]', namespaces=ns)
-                if measure is None:
-                    continue
-                
+            for measure in measures_to_process:
                 # Find all mRest elements in this measure
-                mrests = measure.findall('.//mei:mRest', namespaces=ns)
-                # print(f"Found {len(mrests)} mRest elements in measure {measure_id}.")
+                mrests = list(measure.iter(f'{{{MEI_NS}}}mRest'))
                 
                 for mrest in mrests:
-                    # Use the parent map to find the parent layer of this mRest
-                    if mrest not in parent_map:
-                        continue
-                        
-                    parent = parent_map[mrest]
+                    parent = mrest.getparent()
                     
                     # Find the layer that contains this mRest
                     layer = parent
                     while layer is not None and not layer.tag.endswith('layer'):
-                        if layer in parent_map:
-                            layer = parent_map[layer]
-                        else:
-                            layer = None
+                        layer = layer.getparent()
                     
                     if layer is None:
-                        xml_id = mrest.get(f"{{{ns['xml']}}}id")
-                        # print(f"Warning: Could not find layer for mRest {xml_id}")
                         continue
                     
                     # Get the original mRest ID
-                    mrest_id = mrest.get(f"{{{ns['xml']}}}id")
+                    mrest_id = mrest.get(XML_ID)
                     if not mrest_id:
                         continue          
-                    # print(f"Processing mRest {mrest_id}")
                     
                     # Find the index where we should insert the new rests
-                    if parent is layer:
-                        for i, child in enumerate(layer):
-                            if child is mrest:
-                                insert_index = i
-                                break
-                        else:
-                            insert_index = len(layer)
-                    else:
-                        insert_index = len(layer)
+                    insert_index = layer.index(mrest) if parent is layer else len(layer)
                     
                     # Create multiple rest elements
                     for i in range(3):
                         # Create a new rest element and set attributes
-                        rest = etree.Element(f"{{{ns['mei']}}}rest")
-                        rest.set(f"{{{ns['xml']}}}id", f"{mrest_id}{chr(97 + i)}")
+                        rest = etree.Element(f"{{{MEI_NS}}}rest")
+                        rest.set(XML_ID, f"{mrest_id}{chr(97 + i)}")
                         rest.set('dur', '1')
                         rest.set('dur.ppq', '1024')
                         
@@ -390,23 +315,21 @@ class MEI_Music_Feature_Processor:
                     mRest_counter +=1
                     # print(f"Removed mRest {mrest_id}")
                     
-                    # Update the parent map since we've modified the tree
-                    parent_map = {c: p for p in root.iter() for c in p}
-            print(f"Corrected {mRest_counter} mRests")
+            if self.verbose:
+                print(f"Corrected {mRest_counter} mRests")
     
         #  Remove chord elements
         if remove_chord == True:
-            chords = root.findall('.//mei:chord', namespaces=ns)
-            count = len(chords)
-            print(f"Found {count} chord elements to remove.")
+            chord_tag = f'{{{MEI_NS}}}chord'
+            if self.verbose:
+                count = sum(1 for _ in root.iter(chord_tag))
+                print(f"Found {count} chord elements to remove.")
 
-            for chord in chords:
-                parent = chord.getparent()
-                parent.remove(chord)
+            etree.strip_elements(root, chord_tag, with_tail=True)
 
         # Remove chord elements
         if check_for_chords == True:
-            chords = root.findall('.//mei:chord', namespaces=ns)
+            chords = list(root.iter(f'{{{MEI_NS}}}chord'))
             count = len(chords)
             for chord in chords:
                 parent = chord.getparent()
@@ -418,55 +341,40 @@ class MEI_Music_Feature_Processor:
         if remove_senfl_bracket == True:
             brackets = root.findall('.//mei:line[@type="bracket"]', namespaces=ns)
             count = len(brackets)
-            print(f"Found {count} bracket elements to remove.")
+            if self.verbose:
+                print(f"Found {count} bracket elements to remove.")
             for bracket in brackets:
                 parent = bracket.getparent()
                 parent.remove(bracket)
         
         # Remove empty verse elements
         if remove_empty_verse == True:
-            if remove_empty_verse:
-                # Find all parent elements that might contain verses
-                for parent in root.findall('.//mei:syllable', namespaces=ns):
-                    # Find all verses within this parent
-                    verses = parent.findall('mei:verse', namespaces=ns)
-                    # Create a list of verses to keep
-                    verses_to_keep = []
-                    for verse in verses:
-                        if list(verse):  # If verse has children
-                            verses_to_keep.append(verse)
-                    
-                    # If we found empty verses, clear the parent and add back only non-empty verses
-                    if len(verses_to_keep) < len(verses):
-                        # Remove all verses from parent
-                        for verse in verses:
-                            parent.remove(verse)
-                        # Add back only non-empty verses
-                        for verse in verses_to_keep:
-                            parent.append(verse)
+            # verses under a syllable with no child elements, matched in one query
+            for verse in _XP_EMPTY_VERSES(root):
+                verse.getparent().remove(verse)
         
         # Remove all lyrics
         if remove_lyrics == True:
-            verses = root.findall('.//mei:verse', namespaces=ns)
-            count = len(verses)
-            print(f"Found {count} lyric elements to remove.")
-            for verse in verses:
-                parent = verse.getparent()
-                parent.remove(verse)
+            verse_tag = f'{{{MEI_NS}}}verse'
+            if self.verbose:
+                count = sum(1 for _ in root.iter(verse_tag))
+                print(f"Found {count} lyric elements to remove.")
+            etree.strip_elements(root, verse_tag, with_tail=True)
         
         # Fix elisions
         if fix_elisions == True:
-            verses = root.findall('.//mei:verse', namespaces=ns)
+            verses = list(root.iter(f'{{{MEI_NS}}}verse'))
             for verse in verses:
                 # Set all v numbers to 1
                 verse.set('n', '1')
                 
                 # Find all syl elements
-                syllables = verse.findall('.//mei:syl', namespaces=ns)
+                syllables = list(verse.iter(f'{{{MEI_NS}}}syl'))
                 
                 # Check if there are more than one syl elements
                 if len(syllables) > 1:
-                    print(f"Found elided syllables to correct.")
+                    if self.verbose:
+                        print(f"Found elided syllables to correct.")
                     
                     # Get the text of the first and second syllables
                     first_syllable = syllables[0].text or ""
@@ -488,14 +396,15 @@ class MEI_Music_Feature_Processor:
         
         # Replace slurs with ties
         if slur_to_tie == True:
-            slurs = root.findall('.//mei:slur', namespaces=ns)
+            slurs = list(root.iter(f'{{{MEI_NS}}}slur'))
             count = len(slurs)
-            print(f"Found {count} slurs to correct as ties.")
+            if self.verbose:
+                print(f"Found {count} slurs to correct as ties.")
             for slur in slurs:
                 # Remove specific attributes
-                for attr in ['layer', 'tstamp', 'tstamp2', 'staff']:
-                    if attr in slur.attrib:
-                        del slur.attrib[attr]
+                attrib = slur.attrib
+                for attr in ('layer', 'tstamp', 'tstamp2', 'staff'):
+                    attrib.pop(attr, None)
                 
                 # Change element name to 'tie'
                 slur.tag = f"{{{ns['mei']}}}tie"
@@ -503,43 +412,52 @@ class MEI_Music_Feature_Processor:
         #  combine layers
         if collapse_layers == True:
 
-            staves = root.findall('.//mei:staff', namespaces=ns)
+            staves = list(root.iter(f'{{{MEI_NS}}}staff'))
+            layer_tag = f'{{{MEI_NS}}}layer'
             for staff in staves:
-                layers = staff.findall('.//mei:layer', namespaces=ns)
+                # layers are direct children of their staff
+                layers = list(staff.iterchildren(layer_tag))
+                # layer 1 is looked up once per staff rather than once per layer
+                target_layer = next((layer for layer in layers if layer.get('n') == '1'), None)
+                if target_layer is None:
+                    continue
                 for layer in layers:
                     if layer.get('n') != '1':  # Only process non-layer-1 elements
-                        target_layer = staff.find('.//mei:layer[@n="1"]', namespaces=ns)
-                        if target_layer is not None:
-                            if layer.text or len(layer) > 0:  # Check for any content
-                                # Move all children to target layer
-                                for child in list(layer):
-                                    target_layer.append(child)
-                                # Remove the empty layer
-                                layer.getparent().remove(layer)
+                        if layer.text or len(layer) > 0:  # Check for any content
+                            # Move all children to target layer in one call
+                            target_layer.extend(list(layer))
+                            # Remove the empty layer
+                            staff.remove(layer)
                             
         # correcting ficta as supplied
         if correct_ficta == True:
             # remove 'dir' tags - try both with and without namespace
-            dir_tags = root.findall('.//dir', namespaces=ns) + root.findall('.//mei:dir', namespaces=ns)
-            print(f"Found {len(dir_tags)} dir tags to remove")
+            dir_tags = list(root.iter('dir', f'{{{MEI_NS}}}dir'))
+            if self.verbose:
+                print(f"Found {len(dir_tags)} dir tags to remove")
             for tag in dir_tags:
                 tag.getparent().remove(tag)
         
             # Try both approaches to find notes with color attributes
-            color_notes = root.findall('.//mei:note[@color]', namespaces=ns)
+            color_notes = _XP_COLOR_NOTES(root)
             color_count = len(color_notes) 
-            print(f"Found {color_count} total color notes to correct as supplied.")
+            if self.verbose:
+                print(f"Found {color_count} total color notes to correct as supplied.")
             
             if color_count > 0:
+                # ids are a random per-file prefix plus a counter: unique within the file, no retries
+                id_prefix = f"m-{secrets.token_hex(4)}"
+                id_counter = itertools.count(1)
+                accid_tag = f'{{{MEI_NS}}}accid'
                 for note in color_notes:
-                    # Try both namespace approaches for finding accid elements
-                    accid = note.find('mei:accid', namespaces=ns)
+                    # the note's first accid child, without a path search
+                    accid = next(note.iterchildren(accid_tag), None)
                     
                     if accid is not None:
                         # Handle accid.ges attributes
-                        if 'accid.ges' in accid.attrib:
-                            accid.set('accid', accid.get('accid.ges'))
-                            del accid.attrib['accid.ges']
+                        accid_ges = accid.attrib.pop('accid.ges', None)
+                        if accid_ges is not None:
+                            accid.set('accid', accid_ges)
                             # print('deleted accid.ges')
                         
                         # Remove color attribute
@@ -550,19 +468,16 @@ class MEI_Music_Feature_Processor:
                         accid_value = accid.get('accid')
                         
                         # Generate unique IDs
-                        note_random_id = random.randint(1000000, 9999999)
-                        accid_random_id = random.randint(1000000, 9999999)
+                        supplied_id = f"{id_prefix}-{next(id_counter)}"
+                        accid_id = f"{id_prefix}-{next(id_counter)}"
                         
-                        # ns for xml ids
-                        XML_NS = 'http://www.w3.org/XML/1998/namespace'
-
                         # Create new supplied parent tag
                         supplied_tag = etree.SubElement(
                             note, 
                             'supplied',
                             attrib={
                                 'reason': 'edit',
-                                f'{{{XML_NS}}}id': f"m-{note_random_id}"  # Use Clark notation for xml:id
+                                XML_ID: supplied_id  # Use Clark notation for xml:id
                             }
                         )
                         
@@ -575,7 +490,7 @@ class MEI_Music_Feature_Processor:
                                 'accid': accid_value,
                                 'func': "edit",
                                 'place': "above",
-                                f'{{{XML_NS}}}id': f"m-{accid_random_id}"  # Use Clark notation for xml:id
+                                XML_ID: accid_id  # Use Clark notation for xml:id
                             }
                         )
                         
@@ -586,9 +501,10 @@ class MEI_Music_Feature_Processor:
         # fix voice labels
         if voice_labels == True:
             # revert staffDef/label to staffDef/@label
-            staffDefs = root.findall('.//mei:staffDef', namespaces=ns)
+            staffDefs = list(root.iter(f'{{{MEI_NS}}}staffDef'))
             count = len(staffDefs)
-            print(f"Found {count} staff labels to correct.")
+            if self.verbose:
+                print(f"Found {count} staff labels to correct.")
             
             for staffDef in staffDefs:
                 label_elem = staffDef.find('mei:label', namespaces=ns)
@@ -599,35 +515,27 @@ class MEI_Music_Feature_Processor:
         # save the result
         output_file_path = os.path.join(output_folder, revised_name)
         
-        # Get the MEI namespace
-        mei_ns = "http://www.music-encoding.org/ns/mei"
-        
         # Get the meiversion attribute from the root
         meiversion = root.get("meiversion", "4.0.0")
-        xml_id = root.get("{http://www.w3.org/XML/1998/namespace}id", "m-1")
-        
-        # Convert to string and parse with lxml for better control
-        # xml_string = ET.tostring(root)
-        xml_string = etree.tostring(root)
-        parser = etree.XMLParser(remove_blank_text=True)
-        root_lxml = etree.fromstring(xml_string, parser)
-        
-        # Create a new XML tree with the proper namespace setup
-        new_root = etree.Element("mei", 
-                                nsmap={None: mei_ns},  # Default namespace without prefix
-                                attrib={"meiversion": meiversion,
-                                        "{http://www.w3.org/XML/1998/namespace}id": xml_id})
+        xml_id = root.get(XML_ID, "m-1")
         
-        # Copy the content from the original tree
-        for child in root_lxml:
-            new_root.append(child)
-        
-        # Remove namespace prefixes from all elements except the root
-        for elem in new_root.iter():
-            if elem is not new_root:  # Skip the root element
-                if not hasattr(elem.tag, 'find') or elem.tag.find('}') == -1:
-                    continue
-                elem.tag = elem.tag.split('}', 1)[1]  # Remove namespace prefix
+        if root.nsmap == {None: MEI_NS}:
+            # the usual case: the root already declares only the default MEI namespace,
+            # so it is reused in place with just meiversion and xml:id kept
+            new_root = root
+            new_root.attrib.clear()
+            new_root.set("meiversion", meiversion)
+            new_root.set(XML_ID, xml_id)
+        else:
+            # Create a new XML tree with the proper namespace setup; MEI elements moved under
+            # it serialize against the default namespace, so their tags need no rewriting
+            new_root = etree.Element("mei", 
+                                    nsmap={None: MEI_NS},  # Default namespace without prefix
+                                    attrib={"meiversion": meiversion,
+                                            XML_ID: xml_id})
+            
+            # Move the content over from the original tree
+            new_root.extend(list(root))
         
         # Format the XML with proper indentation
         etree.indent(new_root, space="    ")
@@ -641,9 +549,42 @@ class MEI_Music_Feature_Processor:
         )
         
         # Write to file
+        os.makedirs(output_folder, exist_ok=True)
         with open(output_file_path, 'wb') as f:
             f.write(formatted_xml)
         
-        print(f'Saved updated {revised_name}')
+        if self.verbose:
+            print(f'Saved updated {revised_name}')
         return formatted_xml
 
+    def process_files(self, mei_paths, output_folder, max_workers=None, **options):
+        """Runs process_music_features on a list of MEI files, in parallel.
+
+        Each file is handed to a separate worker process; the module switches are the
+        same keyword arguments that process_music_features takes.
+
+        Args:
+            mei_paths (list): Paths of the MEI files to correct
+            output_folder (str): Path to the output folder for the corrected files
+            max_workers (int, optional): Number of worker processes. Defaults to os.cpu_count().
+            **options: Module switches passed on to process_music_features, such as remove_incipit=False
+
+        Returns:
+            dict: Mapping of each MEI path to 'success' or an error message
+        """
+        mei_paths = list(mei_paths)
+        results = {}
+        if not mei_paths:
+            return results
+
+        # create the output folder once, before any worker writes to it
+        os.makedirs(output_folder, exist_ok=True)
+
+        worker = partial(run_file, MEI_Music_Feature_Processor, 'process_music_features',
+                         self.verbose, **options)
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            for mei_path, status in executor.map(worker, mei_paths,
+                                                 [output_folder] * len(mei_paths),
+                                                 chunksize=chunk_size(len(mei_paths), max_workers)):
+                results[mei_path] = status
+        return results